@@ -2,33 +2,38 @@
 Configuration file entities models
 """
 
-import re
 import typing
 import pydantic
 
 import roothazardlib.configs
 
-class BotConfigModel(
-    roothazardlib.configs.ConstModel,
-    pydantic.BaseModel
-):
+_TG_BOT_ID_LEN: typing.Final = 10
+_TG_SECRET_LEN: typing.Final = 35
+
+_HTTP_URL_ADAPTER: typing.Final = pydantic.TypeAdapter(pydantic.HttpUrl)
+
+
+class BotConfigModel(pydantic.BaseModel):
     """
     Njordr will connect to each tg bot listen in this section
     and then redirect to specific instance
     """
 
+    model_config = pydantic.ConfigDict(frozen=True)
+
     nickname: str
     token: str
-    url: pydantic.HttpUrl
+    url: str
 
-    @pydantic.field_validator('url')
+    @pydantic.field_validator('url', mode='before')
     @classmethod
-    def parse_url(cls, value: pydantic.HttpUrl, _: pydantic.ValidationInfo) -> str:
+    def parse_url(cls, value: typing.Any, _: pydantic.ValidationInfo) -> str:
         """
+        Validate as HttpUrl but keep plain str, it's concatenated per request.
         '/' In the end creates problems for me
         """
 
-        return str(value).rstrip("/")
+        return str(_HTTP_URL_ADAPTER.validate_python(value)).rstrip("/")
 
     @pydantic.field_validator('token')
     @classmethod
@@ -37,34 +42,39 @@ class BotConfigModel(
         Token it's not just a string lets validate it additionaly
         '''
 
-        if not re.match(r"^\d{10}:[a-zA-Z0-9]{35}$", value):
+        bot_id, separator, secret = value.partition(":")
+
+        if not (
+            value.isascii()
+            and separator
+            and len(bot_id) == _TG_BOT_ID_LEN and bot_id.isdigit()
+            and len(secret) == _TG_SECRET_LEN and secret.isalnum()
+        ):
             raise ValueError("Token should match pattern bot_id:secret")
 
         return value
 
 
-class TopSectionsConfigModel(
-    roothazardlib.configs.ConstModel,
-    pydantic.BaseModel
-):
+class TopSectionsConfigModel(pydantic.BaseModel):
     """
     Njordr serves connect to other services and configured
     for different tg bots
     """
 
+    model_config = pydantic.ConfigDict(frozen=True)
+
     server: roothazardlib.configs.ServerConfigModel
     tls: roothazardlib.configs.TLSConfigModel
     bots: typing.Dict[str, BotConfigModel]
 
 
-class NjordrConfigModel(
-    roothazardlib.configs.ConstModel,
-    roothazardlib.configs.ConfigModel
-):
+class NjordrConfigModel(roothazardlib.configs.ConfigModel):
     """
     Just high level model to parse object
     """
 
+    model_config = pydantic.ConfigDict(frozen=True)
+
     cfg: TopSectionsConfigModel
 
     def __getitem__(self, key: str) -> BotConfigModel:
@@ -87,28 +97,3 @@ class NjordrConfig(roothazardlib.configs.YamlConfig): # pylint: disable=too-few-
     """
 
     _model: typing.Optional[NjordrConfigModel]
-
-
-def get_bot_config(bot_id: int) -> BotConfigModel:
-    """
-    Retrieve the configuration for an individual bot.
-
-    Args:
-        bot_id (str): The identifier of the bot.
-
-    Returns:
-        BotConfigModel: An instance of the BotConfigModel representing the
-        configuration for the specified bot.
-    """
-
-    njordr_config: NjordrConfig = NjordrConfig(None)
-    return njordr_config.cfg.bots[str(bot_id)]
-
-
-def get_tls_config() -> roothazardlib.configs.TLSConfigModel:
-    """
-    Get tls part of config
-    """
-
-    njordr_config: NjordrConfig = NjordrConfig(None)
-    return njordr_config.cfg.tls
@@ -6,15 +6,25 @@ Njordr broker service main
 """
 
 import os
+import ssl
 import json
+import queue
 import typing
 import asyncio
+import functools
 import logging.config
+import logging.handlers
 
 import httpx
 import uvicorn
 import fastapi
 
+try:
+    import uvloop
+except ImportError:
+    # uvicorn[standard] doesn't bring uvloop on Windows and PyPy
+    uvloop = None # type: ignore[assignment] # pylint: disable=invalid-name
+
 import pydantic
 
 import aiogram
@@ -25,8 +35,23 @@ import aiogram.fsm.context
 import url_state_handler
 import config
 import njordr
+import roothazardlib.configs
+
+SERVICE_CLIENT: typing.Optional[httpx.AsyncClient] = None
+BOTS_URLS: dict[int, str] = {}
+
+SERVICE_MAX_CONNECTIONS = 100
+SERVICE_LIMITS = httpx.Limits(
+    max_connections=SERVICE_MAX_CONNECTIONS, max_keepalive_connections=20
+)
+# Keep waiting updates out of the pool queue, they'd only hold its timers
+SERVICE_SEMAPHORE = asyncio.Semaphore(SERVICE_MAX_CONNECTIONS)
+SERVICE_TIMEOUT = httpx.Timeout(10.0)
 
-BOTS_SESSIONS: dict[pydantic.HttpUrl, httpx.Client] = {}
+# /start always resets the user to the service root
+START_ACTION: njordr.Action = njordr.Action(
+    method="get", endpoint="/", data=None
+)
 
 logger = logging.getLogger("njordr_service")
 
@@ -45,21 +70,24 @@ def generate_keyboard(
     logger.info("Generating inline keyboard")
 
     for prop in props:
-        logger.info(
+        callback_data = prop.action.model_dump_json()
+
+        logger.debug(
             "Generate button with text: %s; callback_data: %s",
-            prop.text, prop.action.model_dump_json()
+            prop.text, callback_data
         )
 
+        # text and callback_data come from validated njordr models
         buttons.append(
             [
-                aiogram.types.InlineKeyboardButton(
+                aiogram.types.InlineKeyboardButton.model_construct(
                     text=prop.text,
-                    callback_data=prop.action.model_dump_json()
+                    callback_data=callback_data
                 )
             ]
         )
 
-    keyboard = aiogram.types.InlineKeyboardMarkup(
+    keyboard = aiogram.types.InlineKeyboardMarkup.model_construct(
         inline_keyboard=buttons
     )
 
@@ -68,8 +96,30 @@ def generate_keyboard(
     return keyboard
 
 
+def create_service_ssl_context(
+    tls_config: roothazardlib.configs.TLSConfigModel
+) -> ssl.SSLContext:
+    """
+    Load CA and client certificate once for the service client
+    """
+
+    ssl_context = ssl.create_default_context(cafile=tls_config.ca)
+    ssl_context.load_cert_chain(tls_config.client_cert, tls_config.client_key)
+
+    return ssl_context
+
+
+@functools.lru_cache(maxsize=10000)
+def get_assume_role(user_id: int) -> str:
+    """
+    Role identifying telegram user to the service
+    """
+
+    return f"tg:{user_id}"
+
+
 async def make_service_call(
-    bot_config: config.BotConfigModel,
+    bot_id: int,
     user: aiogram.types.User,
     action: njordr.Action,
     full_endpoint: str
@@ -78,38 +128,36 @@ async def make_service_call(
     Make async call to end service to get MessageModel
     """
 
-    async_client = BOTS_SESSIONS[bot_config.url]
+    if SERVICE_CLIENT is None:
+        raise ValueError("Service client is not initialized")
 
     headers = {
-        'assume_role': f"tg:{user.id}"
-    }
-
-    request_parameters = {
-        "headers": headers,
-        "url": f"{bot_config.url}{full_endpoint}",
+        'assume_role': get_assume_role(user.id)
     }
 
-    if action.data is not None:
-        request_parameters["data"] = action.data
+    url = BOTS_URLS[bot_id] + full_endpoint
 
-    logger.info(
-        "Making service call %s(%s)",
-        action.method, request_parameters
+    logger.debug(
+        "Making service call %s(url=%s, headers=%s, data=%s)",
+        action.method, url, headers, action.data
     )
 
     try:
-        response = await getattr(async_client, action.method)(**request_parameters)
+        async with SERVICE_SEMAPHORE:
+            response = await SERVICE_CLIENT.request(
+                action.method, url, headers=headers, data=action.data
+            )
     except httpx.ConnectError as error:
         logger.error(
-            "Connection error: %s; %s", request_parameters['url'], error
+            "Connection error: %s; %s", url, error
         )
 
         return None
 
-    service_response = json.loads(response.contect.decode("utf-8"))
+    service_response = response.json()
     message = njordr.Proto(msg=service_response).msg
 
-    logger.info("Service response: %s", message)
+    logger.debug("Service response: %s", message)
 
     return message
 
@@ -126,17 +174,12 @@ async def start_handler(
         if message.bot is None or message.from_user is None:
             raise ValueError("Unexpected behaviour")
 
-        bot_config: config.BotConfigModel = config.get_bot_config(message.bot.id)
-        action: njordr.Action = njordr.Action(
-            method="get", endpoint=url, data=None
-        )
-
         logger.info(
-            "Received message with action: %s", action
+            "Received message with action: %s", START_ACTION
         )
 
         service_msg = await make_service_call(
-            bot_config, message.from_user, action, url
+            message.bot.id, message.from_user, START_ACTION, url
         )
 
         if service_msg is not None:
@@ -163,7 +206,8 @@ async def message_handler(
     handles manual typing in user chat
     """
 
-    action: njordr.Action = njordr.Action(
+    # Only the text comes from the update and aiogram has validated it already
+    action: njordr.Action = njordr.Action.model_construct(
         method="post", endpoint="", data=message.text
     )
 
@@ -175,10 +219,8 @@ async def message_handler(
         if message.bot is None or message.from_user is None:
             raise ValueError("Unexpected behaviour")
 
-        bot_config: config.BotConfigModel = config.get_bot_config(message.bot.id)
-
         service_msg = await make_service_call(
-            bot_config, message.from_user, action, url
+            message.bot.id, message.from_user, action, url
         )
 
         if service_msg is not None:
@@ -219,10 +261,20 @@ async def callback_query_handler(
         )
         return
 
-    cb_data = json.loads(callback_query.data)
-    action: njordr.Action = njordr.Action(
-        **cb_data
-    )
+    try:
+        action: njordr.Action = njordr.Action.model_validate_json(
+            callback_query.data
+        )
+    except pydantic.ValidationError as error:
+        logger.error(
+            "Invalid callback data: %s; %s", callback_query.data, error
+        )
+
+        await callback_query.message.answer(
+            text="Internal error",
+            reply_markup=None
+        )
+        return
 
     logger.info(
         "Received callback querry with action: %s", action
@@ -234,12 +286,8 @@ async def callback_query_handler(
         if callback_query.bot is None or callback_query.from_user is None:
             raise ValueError("Unexpected behaviour")
 
-        bot_config: config.BotConfigModel = config.get_bot_config(
-            callback_query.bot.id
-        )
-
         service_msg = await make_service_call(
-            bot_config, callback_query.from_user, action, url
+            callback_query.bot.id, callback_query.from_user, action, url
         )
 
         if service_msg is not None:
@@ -270,6 +318,40 @@ async def notification(req: fastapi.Request):
     return {"result": "Unsupported"}
 
 
+async def wait_service_tasks(
+    serving: asyncio.Task,
+    polling: asyncio.Task
+) -> None:
+    """
+    Wait until notification server and bots polling both stop.
+
+    Polling end sets should_exit, so the server is awaited to finish
+    its own shutdown. Polling is cancelled only when the server stops
+    first, and both tasks are cancelled if the caller is cancelled.
+    Failure of either task is re-raised once both are finished.
+    """
+
+    try:
+        done, _ = await asyncio.wait(
+            (serving, polling), return_when=asyncio.FIRST_COMPLETED
+        )
+    except asyncio.CancelledError:
+        serving.cancel()
+        polling.cancel()
+
+        await asyncio.gather(serving, polling, return_exceptions=True)
+        raise
+
+    if polling not in done:
+        polling.cancel()
+
+    results = await asyncio.gather(serving, polling, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
 async def njordr_service():
     """
     Main function for initializing and running the Aiogram bots.
@@ -282,6 +364,8 @@ async def njordr_service():
         asyncio.run(njordr_service())
     """
 
+    global SERVICE_CLIENT # pylint: disable=global-statement
+
     njordr_config = config.NjordrConfig(
         f'{os.environ["SERVICE_CONFIG_DIR"]}/config.yaml'
     )
@@ -293,49 +377,82 @@ async def njordr_service():
 
     dp.callback_query.register(callback_query_handler)
 
-    bots = []
-    for bot_config in njordr_config.cfg.bots.values():
-        bot = aiogram.Bot(
-            token=bot_config.token,
-            parse_mode=aiogram.enums.ParseMode.HTML,
-        )
+    # All bots talk to services with the same TLS identity,
+    # so they share one connection pool
+    SERVICE_CLIENT = httpx.AsyncClient(
+        verify=create_service_ssl_context(njordr_config.cfg.tls),
+        limits=SERVICE_LIMITS,
+        timeout=SERVICE_TIMEOUT
+    )
 
-        BOTS_SESSIONS[bot_config.url] = httpx.AsyncClient(
-            verify=njordr_config.cfg.tls.ca,
-            cert=(
-                njordr_config.cfg.tls.client_cert,
-                njordr_config.cfg.tls.client_key
+    try:
+        bots = []
+        for bot_config in njordr_config.cfg.bots.values():
+            bot = aiogram.Bot(
+                token=bot_config.token,
+                parse_mode=aiogram.enums.ParseMode.HTML,
             )
-        )
 
-        await bot.set_my_commands(
-            [
-                { 'command': '/start', 'description': 'Start'}
-            ]
+            BOTS_URLS[bot.id] = bot_config.url
+
+            logger.info(
+                "Register handler for %s:%s",
+                bot_config.nickname, bot_config.url
+            )
+
+            bots.append(bot)
+
+        await asyncio.gather(
+            *(
+                bot.set_my_commands(
+                    [
+                        { 'command': '/start', 'description': 'Start'}
+                    ]
+                )
+                for bot in bots
+            )
         )
 
-        logger.info(
-            "Register handler for %s:%s",
-            bot_config.nickname, bot_config.url
+        notificaton_config = uvicorn.Config(
+            "main:notifications_api",
+            host=njordr_config.cfg.server.host,
+            port=njordr_config.cfg.server.port
         )
 
-        bots.append(bot)
+        notification_server = uvicorn.Server(notificaton_config)
 
-    notificaton_config = uvicorn.Config(
-        "main:notifications_api",
-        host=njordr_config.cfg.server.host,
-        port=njordr_config.cfg.server.port
-    )
+        async def poll_bots():
+            try:
+                await dp.start_polling(*bots)
+            finally:
+                # Polling ends on SIGINT/SIGTERM, notifications go down with it
+                notification_server.should_exit = True
 
-    notification_server = uvicorn.Server(notificaton_config)
+        serving = asyncio.create_task(notification_server.serve())
+        polling = asyncio.create_task(poll_bots())
 
-    asyncio.create_task(notification_server.serve())
+        await wait_service_tasks(serving, polling)
+    finally:
+        await SERVICE_CLIENT.aclose()
 
-    await asyncio.create_task(dp.start_polling(*bots))
-    await notification_server.shutdown()
 
-    for async_client in BOTS_SESSIONS.values():
-        await async_client.aclose()
+def start_logging_listener() -> logging.handlers.QueueListener:
+    """
+    Move configured root handlers behind a queue, so the event loop
+    only enqueues records and the listener thread does the writes
+    """
+
+    root_logger = logging.getLogger()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    listener = logging.handlers.QueueListener(
+        log_queue, *root_logger.handlers, respect_handler_level=True
+    )
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+
+    listener.start()
+
+    return listener
 
 
 def main():
@@ -348,10 +465,17 @@ def main():
         logging_cfg = json.load(logging_cgf_fd)
 
     logging.config.dictConfig(logging_cfg)
+    logging_listener = start_logging_listener()
 
     coroutine = njordr_service()
 
-    asyncio.run(coroutine)
+    try:
+        if uvloop is None:
+            asyncio.run(coroutine)
+        else:
+            uvloop.run(coroutine)
+    finally:
+        logging_listener.stop()
 
 
 if __name__ == "__main__":
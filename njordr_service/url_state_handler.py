@@ -3,12 +3,14 @@ Handles user url changes
 """
 
 import typing
-import pathlib
 import logging
+import posixpath
 import aiogram.fsm.context
 
 logger = logging.getLogger("njordr_service")
 
+MAX_URL_LENGTH = 512
+
 class UrlStateHandler:
     """
     A context manager for handling URL states within
@@ -36,30 +38,38 @@ class UrlStateHandler:
         self.__new_url = new_url
         self.__state = state
         self.__prev_url_required = prev_url_required
-        self.__state_data: typing.Optional[dict[str, typing.Any]] = None
+        self.__url: typing.Optional[str] = None
 
     async def __aenter__(self) -> str:
-        self.__state_data = await self.__state.get_data()
+        url: str
+
+        if self.__prev_url_required:
+            state_data = await self.__state.get_data()
+            prev_url: typing.Optional[str] = state_data.get("url")
 
-        if self.__prev_url_required and self.__state_data.get("url") is None:
-            raise ValueError("URL not found")
+            if prev_url is None:
+                raise ValueError("URL not found")
 
-        if not self.__prev_url_required:
-            self.__state_data["url"] = "/"
+            url = prev_url
+        else:
+            url = "/"
 
         if self.__new_url is not None:
-            path = pathlib.Path(self.__state_data["url"])
+            url = posixpath.normpath(posixpath.join(url, self.__new_url))
 
-            if len(self.__new_url) > 0:
-                path /= self.__new_url
+            # POSIX keeps exactly two leading slashes, service paths don't
+            if url.startswith("//"):
+                url = url[1:]
 
-            path = path.resolve()
+            if len(url) > MAX_URL_LENGTH:
+                raise ValueError("URL is too long")
 
-            self.__state_data["url"] = path.as_posix()
+        self.__url = url
 
-        logger.info("Formed base url: %s", self.__state_data["url"])
+        logger.info("Formed base url: %s", self.__url)
 
-        return self.__state_data["url"]
+        return self.__url
 
     async def __aexit__(self, *_):
-        await self.__state.update_data(self.__state_data)
+        # Only url is owned by the handler, don't rewrite the rest of the state
+        await self.__state.update_data(url=self.__url)
@@ -0,0 +1,34 @@
+import pydantic
+import pytest
+from njordr_service.config import BotConfigModel
+
+BOT_ID = "1234567890"
+SECRET = "AAbbCCddEEffGGhhIIjjKKllMMnnOOpp123"
+
+
+def make_bot_config(token):
+    return BotConfigModel(
+        nickname="test_bot", token=token, url="https://service.example.com/"
+    )
+
+
+def test_bot_config_valid_token():
+    token = f"{BOT_ID}:{SECRET}"
+
+    assert make_bot_config(token).token == token
+
+
+@pytest.mark.parametrize("token", [
+    f"{BOT_ID}:{SECRET}\n",
+    f"١٢٣٤٥٦٧٨٩٠:{SECRET}",
+    f"{BOT_ID[:-1]}:{SECRET}",
+    f"{BOT_ID}1:{SECRET}",
+    f"{BOT_ID}:{SECRET[:-1]}",
+    f"{BOT_ID}:{SECRET}a",
+    f"{BOT_ID}{SECRET}",
+    f"{BOT_ID}::{SECRET[:-1]}",
+    f"{BOT_ID}:{SECRET[:-1]}é",
+])
+def test_bot_config_invalid_token(token):
+    with pytest.raises(pydantic.ValidationError):
+        make_bot_config(token)
@@ -1,5 +1,5 @@
 import pytest
-from njordr_service.url_state_handler import UrlStateHandler
+from njordr_service.url_state_handler import MAX_URL_LENGTH, UrlStateHandler
 
 pytest_plugins = (
     'pytest_asyncio',
@@ -13,17 +13,19 @@ class StateMock:
     async def get_data(self):
         return self.data
 
-    async def update_data(self, data):
-        self.data = data
+    async def update_data(self, data=None, **kwargs):
+        self.data.update(data or {}, **kwargs)
+        return self.data
 
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize("new_url,result", [
     ("", "/"),
     ("/", "/"),
-    (".", "/")
+    (".", "/"),
     ("/////", "/"),
     ("../../", "/"),
+    ("//hello", "/hello"),
     ("/hello", "/hello"),
     ("/hello.com/", "/hello.com"),
     ("/hello.com/abc", "/hello.com/abc"),
@@ -38,3 +40,28 @@ async def test_url_state_handler_root(new_url, result):
 
     assert state.data.get("url") is not None
     assert state.data["url"] == result
+
+
+@pytest.mark.asyncio
+async def test_url_state_handler_keeps_other_state():
+    state = StateMock({"url": "/hello", "lang": "en"})
+
+    async with UrlStateHandler(
+        new_url="abc", state=state, prev_url_required=True
+    ) as url:
+        assert url == "/hello/abc"
+
+    assert state.data == {"url": "/hello/abc", "lang": "en"}
+
+
+@pytest.mark.asyncio
+async def test_url_state_handler_too_long():
+    state = StateMock({"url": "/" + "a" * (MAX_URL_LENGTH - 1)})
+
+    with pytest.raises(ValueError):
+        async with UrlStateHandler(
+            new_url="b", state=state, prev_url_required=True
+        ):
+            pass
+
+    assert state.data["url"] == "/" + "a" * (MAX_URL_LENGTH - 1)